@@ -1,96 +1,160 @@
+from typing import Any, NamedTuple, Optional
+
 import requests
 import streamlit as st
 
+from backend.resilience import CircuitBreaker, ResponseCache
+
+BASE_URL = "https://api.resrobot.se/v2.1"
+
+# Latency deadline, how long a response counts as fresh and how long a stale
+# response may still be served (all in seconds)
+ENDPOINT_SETTINGS = {
+    "trip": {"timeout": 10, "fresh_ttl": 120, "max_age": 60 * 60},
+    "location.name": {
+        "timeout": 5,
+        "fresh_ttl": 24 * 60 * 60,
+        "max_age": 7 * 24 * 60 * 60,
+    },
+    "departureBoard": {"timeout": 5, "fresh_ttl": 60, "max_age": 30 * 60},
+    "arrivalBoard": {"timeout": 5, "fresh_ttl": 60, "max_age": 30 * 60},
+}
+
+# Shared between all ResRobot instances, since streamlit creates a new one on every rerun
+_response_cache = ResponseCache()
+_breakers = {endpoint: CircuitBreaker() for endpoint in ENDPOINT_SETTINGS}
+
+
+class ApiResponse(NamedTuple):
+    """Response data with the time (epoch seconds) it was fetched from upstream."""
+
+    data: Any = None
+    fetched_at: Optional[float] = None  # None when the request failed
+    stale: bool = False  # older than the endpoint's fresh_ttl
+
 
 class ResRobot:
     def __init__(self, api_key=None):
         """Initialize with API key from secrets.toml or passed dynamically."""
         self.API_KEY = api_key or st.secrets["api"]["API_KEY"]
 
-    def trips(self, origin_id=740000001, destination_id=740098001):
-        """origing_id and destination_id can be found from Stop lookup API"""
-        url = f"https://api.resrobot.se/v2.1/trip?format=json&originId={origin_id}&destId={destination_id}&numF=6&passlist=true&showPassingPoints=true&accessId={self.API_KEY}"  # noqa: E501
+    def _fetch(self, endpoint, params):
+        """Fetch from upstream through the endpoint's circuit breaker."""
+        timeout = ENDPOINT_SETTINGS[endpoint]["timeout"]
 
-        try:
-            response = requests.get(url)
+        def request():
+            response = requests.get(
+                f"{BASE_URL}/{endpoint}",
+                params={**params, "format": "json", "accessId": self.API_KEY},
+                timeout=timeout,
+            )
             response.raise_for_status()
-
             return response.json()
+
+        return _breakers[endpoint].call(request)
+
+    def _get(self, endpoint, params, force_fetch=False):
+        """
+        Stale-while-revalidate GET, returns an ApiResponse.
+
+        Fresh cached data is returned directly. Stale cached data is returned
+        immediately and refreshed in the background. Without cached data the
+        request is made synchronously, returning an empty ApiResponse on failure.
+
+        With force_fetch the request is always made synchronously and written
+        to the cache, the cached data is only returned (as stale) if it fails.
+        """
+        key = (endpoint, tuple(sorted(params.items())))
+        entry = _response_cache.get(key, ENDPOINT_SETTINGS[endpoint]["max_age"])
+
+        if entry is not None and not force_fetch:
+            stale = entry.age() >= ENDPOINT_SETTINGS[endpoint]["fresh_ttl"]
+            if stale:
+                _response_cache.revalidate(key, lambda: self._fetch(endpoint, params))
+            return ApiResponse(entry.data, entry.fetched_at, stale)
+
+        try:
+            data = self._fetch(endpoint, params)
         except requests.exceptions.RequestException as err:
             print(f"Network or HTTP error: {err}")
+            if entry is not None:
+                return ApiResponse(entry.data, entry.fetched_at, True)
+            return ApiResponse()
+
+        entry = _response_cache.put(key, data)
+        return ApiResponse(data, entry.fetched_at)
+
+    def trips(self, origin_id=740000001, destination_id=740098001):
+        """origing_id and destination_id can be found from Stop lookup API"""
+        params = {
+            "originId": origin_id,
+            "destId": destination_id,
+            "numF": 6,
+            "passlist": "true",
+            "showPassingPoints": "true",
+        }
+        return self._get("trip", params)
 
     def access_id_from_location(self, location):
-        url = f"https://api.resrobot.se/v2.1/location.name?input={location}&format=json&accessId={self.API_KEY}"
-        response = requests.get(url)
-        result = response.json()
+        result = self._get("location.name", {"input": location}).data
+        if result is None:
+            return
 
         print(f"{'Name':<50} extId")
 
-        for stop in result.get("stopLocationOrCoordLocation"):
+        for stop in result.get("stopLocationOrCoordLocation", []):
             stop_data = next(iter(stop.values()))
 
             # returns None if extId doesn't exist
             if stop_data.get("extId"):
                 print(f"{stop_data.get('name'):<50} {stop_data['extId']}")
 
-    def timetable_departure(self, location_id=740015565):
-        url = f"https://api.resrobot.se/v2.1/departureBoard?id={location_id}&format=json&accessId={self.API_KEY}"
-        response = requests.get(url)
-        result = response.json()
-        return result
+    def timetable_departure(self, location_id=740015565, force_fetch=False):
+        return self._get("departureBoard", {"id": location_id}, force_fetch)
 
     def timetable_arrival(self, location_id=740015565):
-        url = f"https://api.resrobot.se/v2.1/arrivalBoard?id={location_id}&format=json&accessId={self.API_KEY}"
-        response = requests.get(url)
-        result = response.json()
-        return result
+        return self._get("arrivalBoard", {"id": location_id})
 
     def lookup_stop(self, stop_name: str) -> list:
         """Search for stops based on the stop name using fuzzy matching."""
-        url = "https://api.resrobot.se/v2.1/location.name"
-        params = {
-            "input": f"{stop_name}?",  # Frågetecknet läggs här för fuzzy matching
-            "format": "json",  # Tvinga API:et att returnera JSON
-            "accessId": self.API_KEY,
-        }
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            # Kontrollera efter stopLocationOrCoordLocation
-            if "stopLocationOrCoordLocation" in data:
-                stop_locations = data["stopLocationOrCoordLocation"]
-                results = []
-                for location in stop_locations:
-                    # Iterera över både StopLocation och CoordLocation
-                    if "StopLocation" in location:
-                        stop = location["StopLocation"]
-                        results.append(
-                            {
-                                "name": stop["name"],
-                                "id": stop["extId"],
-                                "lon": stop["lon"],
-                                "lat": stop["lat"],
-                            }
-                        )
-                    elif "CoordLocation" in location:
-                        coord = location["CoordLocation"]
-                        results.append(
-                            {
-                                "name": coord["name"],
-                                "id": coord["id"],
-                                "lon": coord["lon"],
-                                "lat": coord["lat"],
-                            }
-                        )
-                return results
-            else:
-                print(f"Inga hållplatser hittades för '{stop_name}'.")
-                return []
-        except requests.exceptions.RequestException as e:
-            print(f"API-fel: {e}")
+        if not stop_name:
+            return []
+
+        # Frågetecknet läggs här för fuzzy matching
+        data = self._get("location.name", {"input": f"{stop_name}?"}).data
+        if data is None:
+            return []
+
+        # Kontrollera efter stopLocationOrCoordLocation
+        if "stopLocationOrCoordLocation" not in data:
+            print(f"Inga hållplatser hittades för '{stop_name}'.")
             return []
 
+        results = []
+        for location in data["stopLocationOrCoordLocation"]:
+            # Iterera över både StopLocation och CoordLocation
+            if "StopLocation" in location:
+                stop = location["StopLocation"]
+                results.append(
+                    {
+                        "name": stop["name"],
+                        "id": stop["extId"],
+                        "lon": stop["lon"],
+                        "lat": stop["lat"],
+                    }
+                )
+            elif "CoordLocation" in location:
+                coord = location["CoordLocation"]
+                results.append(
+                    {
+                        "name": coord["name"],
+                        "id": coord["id"],
+                        "lon": coord["lon"],
+                        "lat": coord["lat"],
+                    }
+                )
+        return results
+
 
 def get_weather(city_name, OPEN_WEATHER_API_KEY):
     """
@@ -105,7 +169,7 @@ def get_weather(city_name, OPEN_WEATHER_API_KEY):
     """
     url = f"https://api.openweathermap.org/data/2.5/weather?q={city_name}&units=metric&appid={OPEN_WEATHER_API_KEY}"
     try:
-        response = requests.get(url)
+        response = requests.get(url, timeout=5)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
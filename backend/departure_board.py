@@ -1,5 +1,18 @@
+import time
+
 import pandas as pd
 
+# ResRobot returns departure times in Swedish local time
+TIMEZONE = "Europe/Stockholm"
+
+COLUMN_NAMES = {
+    "line_number": "Linje",
+    "direction": "Destination",
+    "minutes_to_departure": "Nästa (min)",
+    "transport_type": "Typ",
+}
+DISPLAY_COLUMNS = ["Typ", "Linje", "Destination", "Nästa (min)"]
+
 
 class DepartureBoard:
     """
@@ -24,16 +37,20 @@ class DepartureBoard:
         else:
             return " "
 
-    def get_departures(self, stop_id):
-        # Fetch departures from the API for a given stop ID
-        data = self.api_client.timetable_departure(stop_id)
-        departures = data.get("Departure", [])
+    def get_departures(self, stop_id, force_fetch=False):
+        """
+        Fetch departures from the API for a given stop ID.
+
+        Returns the ApiResponse with its data replaced by the structured departures.
+        """
+        response = self.api_client.timetable_departure(stop_id, force_fetch)
+        departures = (response.data or {}).get("Departure", [])
 
         structured_departures = []
 
         # Loop through each raw departure entry to structure the data
         for departure in departures:
-            time = departure.get("time")
+            dep_time = departure.get("time")
             date = departure.get("date")
             direction = departure.get("direction")
             transport_type = departure.get("ProductAtStop", {}).get(
@@ -41,22 +58,28 @@ class DepartureBoard:
             )
             line_number = departure.get("ProductAtStop", {}).get("displayNumber", "N/A")
 
-            departure_time = pd.to_datetime(f"{date} {time}")
-            current_time = pd.Timestamp.now()
-            minutes_to_departure = (departure_time - current_time).total_seconds() // 60
+            # Times around the DST switch are ambiguous or don't exist,
+            # pick summer time and shift missing times forward instead of failing
+            departure_epoch = (
+                pd.to_datetime(f"{date} {dep_time}")
+                .tz_localize(TIMEZONE, ambiguous=True, nonexistent="shift_forward")
+                .timestamp()
+            )
+            minutes_to_departure = (departure_epoch - time.time()) // 60
 
             structured_departures.append(
                 {
-                    "time": time,
+                    "time": dep_time,
                     "date": date,
                     "direction": direction,
                     "transport_type": transport_type,
                     "line_number": line_number,
                     "minutes_to_departure": int(minutes_to_departure),
+                    "departure_epoch": departure_epoch,
                 }
             )
 
-        return structured_departures
+        return response._replace(data=structured_departures)
 
     # Filter departures to include only those within 60 minutes
     def filter_departures(self, departures, max_minutes=60):
@@ -66,24 +89,33 @@ class DepartureBoard:
             if 0 <= departure["minutes_to_departure"] <= max_minutes
         ]
 
+    def to_dataframe(self, departures):
+        """Convert structured departures to a DataFrame, keeping the epoch column."""
+        df = pd.DataFrame(
+            departures, columns=[*COLUMN_NAMES, "departure_epoch"]
+        ).rename(columns=COLUMN_NAMES)
+        return df
+
+    def live_view(self, df, max_minutes=60):
+        """Recompute "Nästa (min)" from the cached epoch column without refetching."""
+        df = df.copy()
+        df["Nästa (min)"] = ((df["departure_epoch"] - time.time()) // 60).astype(int)
+        df = df[df["Nästa (min)"].between(0, max_minutes)]
+        return df[DISPLAY_COLUMNS]
+
     def get_departures_dataframe(self, stop_id):
-        """Fetch and process departures as a DataFrame."""
-        departures = self.get_departures(stop_id)
-        filtered_departures = self.filter_departures(departures)
+        """
+        Fetch and process departures as a DataFrame.
 
-        if not filtered_departures:
-            return None
+        Returns the ApiResponse with the DataFrame as data, or None as data if
+        there are no departures within the hour.
+        """
+        response = self.get_departures(stop_id)
+        filtered_departures = self.filter_departures(response.data)
 
-        # Convert to DataFrame
-        df = pd.DataFrame(filtered_departures)
+        if not filtered_departures:
+            return response._replace(data=None)
 
-        df = df.rename(
-            columns={
-                "line_number": "Linje",
-                "direction": "Destination",
-                "minutes_to_departure": "Nästa (min)",
-                "transport_type": "Typ",
-            }
-        )
+        df = self.to_dataframe(filtered_departures)
 
-        return df[["Typ", "Linje", "Destination", "Nästa (min)"]]
+        return response._replace(data=df[DISPLAY_COLUMNS])
@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import deque
+
+MIN_INTERVAL = 60
+MAX_INTERVAL = 300
+# A session that hasn't checked in for this many seconds no longer counts as watching
+SESSION_TIMEOUT = 120
+
+
+class BoardPoller:
+    """
+    Polls the departure board of one stop in a background thread.
+
+    The board is fetched and parsed once per poll no matter how many sessions
+    watch the stop. Sessions are reference counted through heartbeats and the
+    poller stops itself when the last one has gone away. The interval grows
+    while the board is unchanged and resets to MIN_INTERVAL when it changes.
+    """
+
+    def __init__(self, stop_id, departure_board):
+        self.stop_id = stop_id
+        self.departure_board = departure_board
+        self.sessions = {}  # session_id -> last heartbeat (monotonic)
+        self.departures = None  # DataFrame with a departure_epoch column
+        self.fetched_at = None
+        self.version = 0
+        self.diffs = deque(maxlen=20)  # (version, added keys, removed keys)
+        self.interval = MIN_INTERVAL
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"board-poller-{stop_id}", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def heartbeat(self, session_id):
+        with self._lock:
+            self.sessions[session_id] = time.monotonic()
+
+    def leave(self, session_id):
+        with self._lock:
+            self.sessions.pop(session_id, None)
+
+    def active_sessions(self):
+        """Drop sessions that stopped sending heartbeats and return the count left."""
+        now = time.monotonic()
+        with self._lock:
+            self.sessions = {
+                session_id: seen
+                for session_id, seen in self.sessions.items()
+                if now - seen < SESSION_TIMEOUT
+            }
+            return len(self.sessions)
+
+    def snapshot(self):
+        """Return (version, departures, fetched_at) of the latest published board."""
+        with self._lock:
+            return self.version, self.departures, self.fetched_at
+
+    def changes_since(self, version):
+        """Return the keys of departures added and removed after `version`."""
+        added, removed = set(), set()
+        with self._lock:
+            for diff_version, diff_added, diff_removed in self.diffs:
+                if diff_version > version:
+                    # a departure added then removed (or the reverse) cancels out
+                    added, removed = (
+                        (added - diff_removed) | (diff_added - removed),
+                        (removed - diff_added) | (diff_removed - added),
+                    )
+        return added, removed
+
+    @staticmethod
+    def _keys(df):
+        if df is None:
+            return set()
+        return set(zip(df["Linje"], df["Destination"], df["departure_epoch"]))
+
+    def poll(self):
+        """Fetch the board once and publish it if it changed."""
+        # Bypass stale-while-revalidate, it would hand back the previous poll's
+        # data. The fetch still updates the cache for one-off lookups.
+        response = self.departure_board.get_departures(self.stop_id, force_fetch=True)
+
+        if response.fetched_at is None or response.stale:
+            # upstream failed, keep the published board and back off
+            self.interval = min(self.interval * 2, MAX_INTERVAL)
+            return
+
+        df = self.departure_board.to_dataframe(response.data)
+        with self._lock:
+            old_keys = self._keys(self.departures)
+            new_keys = self._keys(df)
+            self.fetched_at = response.fetched_at
+            if self.departures is not None and old_keys == new_keys:
+                self.interval = min(self.interval * 1.5, MAX_INTERVAL)
+                return
+            self.version += 1
+            self.departures = df
+            self.diffs.append((self.version, new_keys - old_keys, old_keys - new_keys))
+            self.interval = MIN_INTERVAL
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            if not self.active_sessions():
+                _remove_poller(self)
+                return
+            try:
+                self.poll()
+            except Exception as err:
+                # never let a bad response kill the shared poller
+                print(f"Polling stop {self.stop_id} failed: {err}")
+                self.interval = min(self.interval * 2, MAX_INTERVAL)
+
+
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+
+def _remove_poller(poller):
+    with _pollers_lock:
+        if _pollers.get(poller.stop_id) is poller:
+            del _pollers[poller.stop_id]
+    poller.stop()
+
+
+def watch(stop_id, session_id, departure_board):
+    """
+    Register `session_id` as watching `stop_id` and return the stop's poller.
+
+    The first session to watch a stop creates the poller and fetches the board
+    right away. Call this on every refresh tick; it doubles as the heartbeat.
+    """
+    with _pollers_lock:
+        poller = _pollers.get(stop_id)
+        created = poller is None
+        if created:
+            poller = BoardPoller(stop_id, departure_board)
+            _pollers[stop_id] = poller
+        poller.heartbeat(session_id)
+
+    if created:
+        try:
+            poller.poll()
+        except Exception as err:
+            print(f"Polling stop {stop_id} failed: {err}")
+        poller.start()
+    return poller
+
+
+def unwatch(stop_id, session_id):
+    """Stop counting `session_id` as a viewer of `stop_id`."""
+    with _pollers_lock:
+        poller = _pollers.get(stop_id)
+    if poller is not None:
+        poller.leave(session_id)
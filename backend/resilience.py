@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    A per-endpoint circuit breaker.
+
+    Only timeouts, connection errors and 5xx responses count as failures, a 4xx
+    is the caller's fault and is raised without affecting the breaker. After
+    `failure_threshold` consecutive failures the breaker opens and every call
+    fails fast with CircuitOpenError. Once `reset_timeout` seconds have
+    passed a single probe call is let through (half-open); if it succeeds the
+    breaker closes again, if it raises anything it stays open for another
+    round. A probe that never reports back is replaced after `reset_timeout`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # let exactly one probe through, other callers keep failing fast
+                self.state = self.HALF_OPEN
+                self.opened_at = time.monotonic()
+                return
+            raise CircuitOpenError("Circuit is open, upstream is failing")
+
+    def _on_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def _on_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    @staticmethod
+    def is_upstream_failure(err):
+        if isinstance(
+            err, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+        ):
+            return True
+        response = getattr(err, "response", None)
+        return response is not None and response.status_code >= 500
+
+    def call(self, func, *args, **kwargs):
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except requests.exceptions.RequestException as err:
+            if self.is_upstream_failure(err):
+                self._on_failure()
+            else:
+                # upstream answered, so it is healthy even if the request was bad
+                self._on_success()
+            raise
+        except Exception:
+            # e.g. a malformed response, never leave a probe unresolved
+            self._on_failure()
+            raise
+        self._on_success()
+        return result
+
+
+class CacheEntry:
+    def __init__(self, data, fetched_at):
+        self.data = data
+        self.fetched_at = fetched_at
+
+    def age(self):
+        """Age of the entry in seconds."""
+        return time.time() - self.fetched_at
+
+
+class ResponseCache:
+    """
+    Thread-safe cache of the last good response per request key.
+
+    An old entry is still served (marked stale) while a background refresh
+    tries to replace it, until it's older than the `max_age` given to get().
+    The cache holds at most `max_entries` keys and evicts the least recently
+    used one when full.
+    """
+
+    def __init__(self, max_entries=512, max_workers=4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="revalidate"
+        )
+
+    def get(self, key, max_age=None):
+        """Return the entry for `key`, or None if missing or older than `max_age`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if max_age is not None and entry.age() > max_age:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, data):
+        """Store `data` under `key` and return the new CacheEntry."""
+        entry = CacheEntry(data, time.time())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def revalidate(self, key, fetch):
+        """Refresh `key` in the background, unless a refresh is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, key, fetch)
+
+    def _refresh(self, key, fetch):
+        try:
+            self.put(key, fetch())
+        except Exception as err:
+            print(f"Background refresh failed: {err}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -9,9 +9,13 @@ resrobot = ResRobot()
 
 class TripPlanner:
     def __init__(self, origin_id, destination_id):
-        data = resrobot.trips(origin_id, destination_id)
+        response = resrobot.trips(origin_id, destination_id)
+        data = response.data
         self.trips = data.get("Trip", []) if data else []
         self.number_trips = len(self.trips)
+        # epoch seconds of the underlying API response, None if the request failed
+        self.fetched_at = response.fetched_at
+        self.stale = response.stale
 
     def next_available_trip(self):
         t = self.trips[0]
@@ -0,0 +1,120 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from backend.resilience import CircuitBreaker
+
+WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+# Grid cell size in degrees, 0.1° is roughly 11 km north-south. Coarse enough
+# that the stops of a city trip share one or two readings, fine enough that a
+# long trip still gets weather for each town it passes. Umeå -> Göteborg has
+# 22 stops in 17 cells, see explorations/benchmark_weather_calls.py.
+GRID_SIZE = 0.1
+# Seconds a cached reading is used before it's fetched again
+WEATHER_TTL = 10 * 60
+
+# Shared between all WeatherService instances, since streamlit reruns the script
+_weather_cache = {}  # (grid_size, cell) -> (fetched_at, weather)
+_weather_cache_lock = threading.Lock()
+_breaker = CircuitBreaker()
+
+
+class WeatherService:
+    """
+    Current weather keyed by coordinates instead of city name.
+
+    Coordinates are snapped to a grid so nearby stops share one cached reading.
+    """
+
+    def __init__(self, api_key, grid_size=GRID_SIZE, ttl=WEATHER_TTL, max_workers=8):
+        self.api_key = api_key
+        self.grid_size = grid_size
+        self.ttl = ttl
+        self.max_workers = max_workers
+
+    def cell(self, lat, lon):
+        """Snap a coordinate to the index of its grid cell."""
+        return round(float(lat) / self.grid_size), round(float(lon) / self.grid_size)
+
+    def cell_center(self, cell):
+        """Return (lat, lon) of the center of a grid cell."""
+        return (
+            round(cell[0] * self.grid_size, 4),
+            round(cell[1] * self.grid_size, 4),
+        )
+
+    def _fetch(self, cell):
+        lat, lon = self.cell_center(cell)
+
+        def request():
+            response = requests.get(
+                WEATHER_URL,
+                params={
+                    "lat": lat,
+                    "lon": lon,
+                    "units": "metric",
+                    "appid": self.api_key,
+                },
+                timeout=5,
+            )
+            response.raise_for_status()
+            return response.json()
+
+        return _breaker.call(request)
+
+    def _cached(self, cell):
+        with _weather_cache_lock:
+            entry = _weather_cache.get((self.grid_size, cell))
+        if entry is not None and time.time() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def _store(self, cell, weather):
+        now = time.time()
+        with _weather_cache_lock:
+            # drop expired cells so the cache only holds recently viewed areas
+            for key in [
+                key
+                for key, (fetched_at, _) in _weather_cache.items()
+                if now - fetched_at >= self.ttl
+            ]:
+                del _weather_cache[key]
+            _weather_cache[(self.grid_size, cell)] = (now, weather)
+
+    def _get_cell(self, cell):
+        weather = self._cached(cell)
+        if weather is not None:
+            return weather
+        try:
+            weather = self._fetch(cell)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching weather data: {e}")
+            return None
+        self._store(cell, weather)
+        return weather
+
+    def get(self, lat, lon):
+        """Current weather at a coordinate, None if it couldn't be fetched."""
+        return self._get_cell(self.cell(lat, lon))
+
+    def get_many(self, coordinates):
+        """
+        Fetch weather for many (lat, lon) pairs with one request per distinct cell.
+
+        Cells not in the cache are fetched concurrently. Returns a dict mapping
+        each cell to its weather, or None for cells that failed.
+        """
+        cells = list(dict.fromkeys(self.cell(lat, lon) for lat, lon in coordinates))
+        if not cells:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(cells))) as pool:
+            return dict(zip(cells, pool.map(self._get_cell, cells)))
+
+    def for_trip(self, df_stops):
+        """Weather for every grid cell along a trip, from its lat/lon columns."""
+        stops = df_stops[["lat", "lon"]].dropna()
+        return self.get_many(zip(stops["lat"], stops["lon"]))
@@ -0,0 +1,87 @@
+"""
+Counts OpenWeatherMap calls for one Tidtabell session, before and after the
+coordinate-keyed WeatherService.
+
+requests.get is replaced by a mock that counts calls, so no API key or network
+is needed. The trip is the Umeå -> Göteborg trip from
+exploring_travel_planner.ipynb.
+
+Calls per session go up (10 -> 17 with the defaults): before, only the typed
+Från/Till text was looked up, which fails for stop names and covers none of
+the stops along the trip. After, the two selected stops are looked up by
+coordinates once and every stop on the trip gets weather, one call per grid
+cell. A long-distance trip like this one crosses many 0.1° cells; a trip
+within a city collapses to one or two.
+
+Run from the repository root: python -m explorations.benchmark_weather_calls
+"""
+
+from unittest import mock
+
+import pandas as pd
+
+from backend import weather
+from backend.connect_to_api import get_weather
+
+# Streamlit reruns the script on every widget interaction: typing Från, typing
+# Till, searching stops, fetching the timetable and selecting a trip
+RERUNS = 5
+
+ORIGIN = {"name": "Umeå Centralstation", "lat": 63.830064, "lon": 20.26681}
+DESTINATION = {"name": "Göteborg Centralstation", "lat": 57.708895, "lon": 11.973479}
+
+TRIP_STOPS = pd.DataFrame(
+    {
+        "lat": [
+            63.830064, 63.817659, 63.632661, 63.578303, 63.343909, 63.303035,
+            63.289282, 62.929111, 62.635182, 62.486392, 62.389893, 62.386873,
+            62.386873, 61.724494, 61.299600, 60.676118, 60.676118, 59.278942,
+            59.066698, 58.390898, 58.079188, 57.708895,
+        ],
+        "lon": [
+            20.266810, 20.293454, 19.908464, 19.486285, 19.155725, 18.716108,
+            18.704305, 17.778182, 17.928635, 17.330546, 17.291668, 17.315633,
+            17.315633, 17.109034, 17.035682, 17.151221, 17.151221, 15.211348,
+            15.110391, 13.853195, 13.021279, 11.973479,
+        ],
+    }
+)  # fmt: skip
+
+
+def count_calls(session):
+    """Run `session` with requests.get mocked and return the number of calls."""
+    with mock.patch("requests.get") as fake_get:
+        session()
+    return fake_get.call_count
+
+
+def baseline_session():
+    """Before: get_weather for the typed Från/Till text on every rerun."""
+    for _ in range(RERUNS):
+        get_weather("Umeå", "key")
+        get_weather("Göteborg", "key")
+
+
+def grid_session():
+    """After: selected stops by coordinates every rerun, trip overlay once."""
+    weather_service = weather.WeatherService("key")
+    for _ in range(RERUNS):
+        weather_service.get(ORIGIN["lat"], ORIGIN["lon"])
+        weather_service.get(DESTINATION["lat"], DESTINATION["lon"])
+    weather_service.for_trip(TRIP_STOPS)
+
+
+def main():
+    service = weather.WeatherService("key")
+    cells = {service.cell(lat, lon) for lat, lon in TRIP_STOPS.values}
+    print(f"{RERUNS} reruns, trip with {len(TRIP_STOPS)} stops in {len(cells)} cells")
+    print(f"{'Session':<40} calls  trip stops with weather")
+    print(f"{'before: get_weather(city)':<40} {count_calls(baseline_session):>5}  0")
+    print(
+        f"{'after: WeatherService':<40} "
+        f"{count_calls(grid_session):>5}  {len(TRIP_STOPS)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,22 @@
+import time
+import uuid
 from datetime import datetime
 
 import folium
 import pandas as pd
 import streamlit as st
 
+from backend import live_board
 from backend.connect_to_api import ResRobot, get_weather
 from backend.departure_board import DepartureBoard
 from backend.trips import TripPlanner
+from backend.weather import WeatherService
 
 # Default Configuration
 DEFAULT_COORDS = {"lat": 57.7089, "lon": 11.9746}
+LIVE_TICK_SECONDS = 15
 OPEN_WEATHER_API_KEY = st.secrets["api"]["OPEN_WEATHER_API_KEY"]
+weather_service = WeatherService(OPEN_WEATHER_API_KEY)
 
 # Streamlit UI Styling
 st.markdown(
@@ -43,13 +49,32 @@ st.markdown(
 )
 
 
-@st.cache_data
 def fetch_timetable(origin_id, destination_id):
-    """Fetches timetable from the API."""
+    """Fetches timetable from the API together with when and if it's stale."""
     if not origin_id or not destination_id:
-        return []  # Fix: Return an empty list instead of None
+        return [], None, False  # Fix: Return an empty list instead of None
+    # No st.cache_data here, ResRobot caches responses and revalidates stale ones
     tp = TripPlanner(origin_id, destination_id)
-    return tp.trips_for_next_hour() or []
+    return tp.trips_for_next_hour() or [], tp.fetched_at, tp.stale
+
+
+def show_data_age(fetched_at, stale=False, refresh_button=None):
+    """
+    Shows how old the displayed data is when it isn't fresh from the API.
+
+    Stale data has started a refresh of ResRobot's cache, but the page keeps
+    what it shows until the user presses `refresh_button` again.
+    """
+    if fetched_at is None:
+        return
+    minutes = int((time.time() - fetched_at) // 60)
+    if stale and refresh_button:
+        st.caption(
+            f"⏱️ Datan är {minutes} minuter gammal, "
+            f'tryck på "{refresh_button}" igen för nyare data'
+        )
+    elif minutes >= 1:
+        st.caption(f"⏱️ Datan är {minutes} minuter gammal")
 
 
 def initialize_session_state():
@@ -62,11 +87,21 @@ def initialize_session_state():
         "selected_trip",
         "map_html",
         "timetable",
+        "timetable_fetched_at",
+        "timetable_stale",
     ]:
         if key not in st.session_state:
             st.session_state[key] = (
                 None
-                if key in ["origin_id", "destination_id", "timetable", "selected_trip"]
+                if key
+                in [
+                    "origin_id",
+                    "destination_id",
+                    "timetable",
+                    "timetable_fetched_at",
+                    "timetable_stale",
+                    "selected_trip",
+                ]
                 else []
             )
 
@@ -104,6 +139,17 @@ def display_map_with_trip(trip):
         folium.PolyLine(
             locations=coordinates, color="blue", weight=5, opacity=0.7
         ).add_to(folium_map)
+
+        # One weather marker per grid cell along the route
+        for cell, w in weather_service.for_trip(stops).items():
+            if not w:
+                continue
+            folium.Marker(
+                location=list(weather_service.cell_center(cell)),
+                icon=folium.CustomIcon(weather_icon_url(w), icon_size=(50, 50)),
+                popup=f"{w['main']['temp']}°C, {w['weather'][0]['description']}",
+            ).add_to(folium_map)
+
         st.session_state.map_html = folium_map._repr_html_()
 
 
@@ -139,9 +185,11 @@ def handle_fetch_timetable():
         return
 
     if st.button("📅 Hämta tidtabell", key="fetch_schedule"):
-        st.session_state.timetable = fetch_timetable(
-            st.session_state.origin_id, st.session_state.destination_id
-        )
+        (
+            st.session_state.timetable,
+            st.session_state.timetable_fetched_at,
+            st.session_state.timetable_stale,
+        ) = fetch_timetable(st.session_state.origin_id, st.session_state.destination_id)
         st.session_state.selected_trip = None
 
 
@@ -151,6 +199,11 @@ def handle_trip_selection():
         return
 
     st.write("### 📅 Välj en resa:")
+    show_data_age(
+        st.session_state.timetable_fetched_at,
+        st.session_state.timetable_stale,
+        refresh_button="📅 Hämta tidtabell",
+    )
     for index, t in enumerate(st.session_state.timetable):
         label = t.get(
             "label", "Okänd resa"
@@ -160,27 +213,41 @@ def handle_trip_selection():
             display_map_with_trip(t)
 
 
+def weather_icon_url(w):
+    return f"http://openweathermap.org/img/wn/{w['weather'][0]['icon']}@2x.png"
+
+
+def render_weather(w, title):
+    """Renders a weather reading from OpenWeatherMap."""
+    st.subheader(title)
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.image(weather_icon_url(w), width=100)
+    with col2:
+        st.write(f"🌡️ {w['main']['temp']}°C")
+        st.write(f"💨 {w['wind']['speed']} m/s")
+        st.write(f"☁  {w['weather'][0]['description'].capitalize()}")
+        st.write(f"💧 {w['main']['humidity']}%")
+        st.write(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
 def weather_section(city_name):
     w = get_weather(city_name, OPEN_WEATHER_API_KEY)
     if w:
-        weather_icon_code = w["weather"][0]["icon"]
-        weather_icon_url = (
-            f"http://openweathermap.org/img/wn/{weather_icon_code}@2x.png"
-        )
-        st.subheader(f"Vädret i {w['name']}, {w['sys']['country']}")
-        col1, col2 = st.columns([1, 2])
-        with col1:
-            st.image(weather_icon_url, width=100)
-        with col2:
-            st.write(f"🌡️ {w['main']['temp']}°C")
-            st.write(f"💨 {w['wind']['speed']} m/s")
-            st.write(f"☁  {w['weather'][0]['description'].capitalize()}")
-            st.write(f"💧 {w['main']['humidity']}%")
-            st.write(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        render_weather(w, f"Vädret i {w['name']}, {w['sys']['country']}")
     else:
         st.error(f"Kunde inte hämta vädret för {city_name}.")
 
 
+def stop_weather_section(stop):
+    """Shows the weather at a stop, looked up by its coordinates."""
+    w = weather_service.get(stop["lat"], stop["lon"])
+    if w:
+        render_weather(w, f"Vädret vid {stop['name']}")
+    else:
+        st.error(f"Kunde inte hämta vädret för {stop['name']}.")
+
+
 def format_trip_dataframe(df):
     """Formats trip DataFrame with readable time and calculates time remaining."""
     df["depTime"] = pd.to_datetime(df["depTime"], format="%H:%M:%S", errors="coerce")
@@ -233,12 +300,11 @@ def tidtabell_tab():
     origin_name = st.text_input("Från:", key="origin_name")
     destination_name = st.text_input("Till:", key="destination_name")
 
-    if origin_name:
-        weather_section(origin_name)
-    if destination_name:
-        weather_section(destination_name)
-
     handle_search_stops(origin_name, destination_name)
+    for key in ["origin_choice", "destination_choice"]:
+        if st.session_state.get(key):
+            stop_weather_section(st.session_state[key])
+
     handle_fetch_timetable()
     handle_trip_selection()
     render_map()
@@ -277,25 +343,91 @@ def avgangstavla_tab():
 
     stop_id = selected_stop["id"]
 
+    live = st.checkbox("🔴 Live-läge (uppdateras automatiskt)", key="live_departures")
+    watched_stop_id = st.session_state.get("live_stop_id")
+    if watched_stop_id is not None and (not live or watched_stop_id != stop_id):
+        live_board.unwatch(watched_stop_id, get_session_id())
+        st.session_state.live_stop_id = None
+
+    if live:
+        st.session_state.live_stop_id = stop_id
+        live_departures(stop_id, departure_board)
+        return
+
     if st.button("Visa avgångar", key="show_departures"):
-        df = departure_board.get_departures_dataframe(stop_id)
+        response = departure_board.get_departures_dataframe(stop_id)
+        if response.fetched_at is None:
+            st.error("Kunde inte hämta avgångar just nu, försök igen om en stund.")
+            return
+        df = response.data
         if df is None or df.empty:
             st.error("Inga avgångar inom den närmsta timmen hittades.")
             return
 
-        st.write("### Avgångar:")
-        st.markdown(
-            """
-            <style>
-                th, td { text-align: left !important; }
-            </style>
-            """,
-            unsafe_allow_html=True,
-        )
-        df["Typ"] = df["Typ"].apply(
-            lambda x: departure_board.map_transport_icon(x) + " " + x
+        render_departures(
+            df,
+            departure_board,
+            response.fetched_at,
+            response.stale,
+            refresh_button="Visa avgångar",
         )
-        st.markdown(df.to_html(escape=False, index=False), unsafe_allow_html=True)
+
+
+def get_session_id():
+    """Returns a stable id for this browser session, used to count live viewers."""
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+
+def render_departures(
+    df, departure_board, fetched_at, stale=False, refresh_button=None
+):
+    """Renders a departure DataFrame as a table with transport icons."""
+    st.write("### Avgångar:")
+    show_data_age(fetched_at, stale, refresh_button)
+    st.markdown(
+        """
+        <style>
+            th, td { text-align: left !important; }
+        </style>
+        """,
+        unsafe_allow_html=True,
+    )
+    df["Typ"] = df["Typ"].apply(
+        lambda x: departure_board.map_transport_icon(x) + " " + x
+    )
+    st.markdown(df.to_html(escape=False, index=False), unsafe_allow_html=True)
+
+
+@st.fragment(run_every=LIVE_TICK_SECONDS)
+def live_departures(stop_id, departure_board):
+    """
+    Live departure board for one stop.
+
+    The board is fetched by a poller shared by every session watching the stop,
+    each tick here only recomputes "Nästa (min)" from the cached departures.
+    """
+    poller = live_board.watch(stop_id, get_session_id(), departure_board)
+    version, departures, fetched_at = poller.snapshot()
+    if departures is None:
+        st.error("Kunde inte hämta avgångar just nu, försöker igen automatiskt.")
+        return
+
+    # Only report changes for the stop the user already looked at
+    if st.session_state.get("live_seen_stop") == stop_id:
+        added, removed = poller.changes_since(st.session_state.live_seen_version)
+        if added or removed:
+            st.caption(f"🔄 {len(added)} nya och {len(removed)} borttagna avgångar")
+    st.session_state.live_seen_stop = stop_id
+    st.session_state.live_seen_version = version
+
+    df = departure_board.live_view(departures)
+    if df.empty:
+        st.error("Inga avgångar inom den närmsta timmen hittades.")
+        return
+
+    render_departures(df, departure_board, fetched_at)
 
 
 def weather_tab():
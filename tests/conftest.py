@@ -0,0 +1,20 @@
+import pytest
+
+
+class FakeResponse:
+    """Stands in for requests.Response with a successful status and JSON body."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+@pytest.fixture
+def fake_response():
+    """Factory for FakeResponse, for tests that replace requests.get."""
+    return FakeResponse
@@ -0,0 +1,109 @@
+import time
+
+import pytest
+
+from backend import live_board
+from backend.connect_to_api import ApiResponse
+from backend.departure_board import DepartureBoard
+
+
+def departure(line, date="2030-01-01", dep_time="12:00:00"):
+    return {
+        "time": dep_time,
+        "date": date,
+        "direction": "Centrum",
+        "ProductAtStop": {"catOutL": "Buss", "displayNumber": line},
+    }
+
+
+class FakeApiClient:
+    """Returns the departures in `boards`, one board per call, repeating the last."""
+
+    def __init__(self, *boards):
+        self.boards = list(boards)
+        self.calls = 0
+
+    def timetable_departure(self, stop_id, force_fetch=False):
+        self.calls += 1
+        board = self.boards.pop(0) if len(self.boards) > 1 else self.boards[0]
+        return ApiResponse({"Departure": board}, time.time())
+
+
+def lines(keys):
+    return {line for line, _, _ in keys}
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(live_board, "_pollers", {})
+
+
+def test_changes_since_folds_several_diffs():
+    api_client = FakeApiClient(
+        [departure("1"), departure("2")],
+        [departure("2"), departure("3")],
+        [departure("3"), departure("4")],
+        [departure("4"), departure("1")],
+    )
+    poller = live_board.BoardPoller(1, DepartureBoard(api_client))
+    poller.poll()
+    first_version = poller.snapshot()[0]
+    for _ in range(3):
+        poller.poll()
+
+    added, removed = poller.changes_since(first_version)
+
+    # 1 was removed and added back, 3 came and went, so both cancel out
+    assert lines(added) == {"4"}
+    assert lines(removed) == {"2"}
+    assert poller.changes_since(poller.snapshot()[0]) == (set(), set())
+
+
+def test_unchanged_board_is_not_republished_and_slows_down():
+    api_client = FakeApiClient([departure("1")])
+    poller = live_board.BoardPoller(1, DepartureBoard(api_client))
+    poller.poll()
+    poller.poll()
+
+    assert poller.snapshot()[0] == 1
+    assert poller.interval > live_board.MIN_INTERVAL
+
+
+def test_sessions_share_one_poller_and_one_fetch():
+    api_client = FakeApiClient([departure("1")])
+    board = DepartureBoard(api_client)
+
+    first = live_board.watch(1, "session-a", board)
+    second = live_board.watch(1, "session-b", board)
+    first.stop()
+
+    assert first is second
+    assert api_client.calls == 1
+    assert first.active_sessions() == 2
+
+
+def test_poller_stops_when_sessions_time_out(monkeypatch):
+    monkeypatch.setattr(live_board, "MIN_INTERVAL", 0.01)
+    monkeypatch.setattr(live_board, "SESSION_TIMEOUT", 0.05)
+    poller = live_board.watch(1, "session-a", DepartureBoard(FakeApiClient([])))
+
+    poller._thread.join(timeout=2)
+
+    assert not poller._thread.is_alive()
+    assert 1 not in live_board._pollers
+
+
+def test_departures_at_dst_switch_do_not_fail():
+    api_client = FakeApiClient(
+        [
+            # ambiguous, clocks go back at 03:00
+            departure("1", date="2026-10-25", dep_time="02:30:00"),
+            # nonexistent, clocks go forward at 02:00
+            departure("2", date="2026-03-29", dep_time="02:30:00"),
+        ]
+    )
+
+    departures = DepartureBoard(api_client).get_departures(1).data
+
+    assert len(departures) == 2
+    assert all(d["departure_epoch"] > 0 for d in departures)
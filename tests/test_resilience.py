@@ -0,0 +1,206 @@
+import threading
+
+import pytest
+import requests
+
+from backend import connect_to_api
+from backend.connect_to_api import ResRobot
+from backend.resilience import CircuitBreaker, CircuitOpenError, ResponseCache
+
+
+def http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.exceptions.HTTPError(f"{status_code}", response=response)
+
+
+def fail_with(err):
+    def func(*args, **kwargs):
+        raise err
+
+    return func
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=3)
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.Timeout):
+            breaker.call(fail_with(requests.exceptions.Timeout()))
+    assert breaker.state == CircuitBreaker.OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: calls.append(1))
+    assert calls == []
+
+
+def test_breaker_half_open_probe_success_closes():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        breaker.call(fail_with(requests.exceptions.ConnectionError()))
+    breaker.opened_at -= 31
+
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_breaker_half_open_probe_failure_reopens():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.HTTPError):
+            breaker.call(fail_with(http_error(503)))
+    breaker.opened_at -= 31
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        breaker.call(fail_with(http_error(500)))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
+
+
+def test_breaker_half_open_probe_with_other_error_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    with pytest.raises(requests.exceptions.Timeout):
+        breaker.call(fail_with(requests.exceptions.Timeout()))
+    breaker.opened_at -= 31
+
+    with pytest.raises(ValueError):
+        breaker.call(fail_with(ValueError("bad payload")))
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.opened_at -= 31
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_replaces_a_probe_that_never_reports_back():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    with pytest.raises(requests.exceptions.Timeout):
+        breaker.call(fail_with(requests.exceptions.Timeout()))
+    breaker.opened_at -= 31
+    breaker._before_call()  # probe admitted but never finishes
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "ok")
+    breaker.opened_at -= 31
+    assert breaker.call(lambda: "ok") == "ok"
+
+
+def test_breaker_ignores_client_errors():
+    breaker = CircuitBreaker(failure_threshold=1)
+    for _ in range(5):
+        with pytest.raises(requests.exceptions.HTTPError):
+            breaker.call(fail_with(http_error(400)))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a").data == 1
+    assert cache.get("c").data == 3
+
+
+def test_put_returns_the_stored_entry_even_if_evicted():
+    cache = ResponseCache(max_entries=1)
+    entry = cache.put("a", 1)
+    cache.put("b", 2)
+
+    assert entry.data == 1
+    assert entry.fetched_at > 0
+    assert cache.get("a") is None
+
+
+def test_cache_drops_entries_older_than_max_age():
+    cache = ResponseCache()
+    cache.put("a", 1)
+    cache.get("a").fetched_at -= 100
+
+    assert cache.get("a", max_age=200).data == 1
+    assert cache.get("a", max_age=50) is None
+    assert cache.get("a") is None
+
+
+@pytest.fixture
+def fresh_client_state(monkeypatch):
+    monkeypatch.setattr(connect_to_api, "_response_cache", ResponseCache())
+    monkeypatch.setattr(
+        connect_to_api,
+        "_breakers",
+        {endpoint: CircuitBreaker() for endpoint in connect_to_api.ENDPOINT_SETTINGS},
+    )
+
+
+def test_stale_hit_triggers_exactly_one_revalidation(
+    monkeypatch, fresh_client_state, fake_response
+):
+    calls = []
+    release = threading.Event()
+    refreshed = threading.Event()
+
+    def fake_get(url, params, timeout):
+        calls.append(params["id"])
+        if len(calls) > 1:
+            # hold the background refresh until both stale reads are done
+            release.wait(timeout=5)
+            refreshed.set()
+        return fake_response({"call": len(calls)})
+
+    monkeypatch.setattr(requests, "get", fake_get)
+    client = ResRobot(api_key="key")
+
+    first = client.timetable_departure(1)
+    assert first.data == {"call": 1}
+    assert not first.stale
+
+    for entry in connect_to_api._response_cache._entries.values():
+        entry.fetched_at -= connect_to_api.ENDPOINT_SETTINGS["departureBoard"][
+            "fresh_ttl"
+        ]
+
+    stale_reads = [client.timetable_departure(1) for _ in range(2)]
+    release.set()
+    assert refreshed.wait(timeout=5)
+
+    assert all(read.stale and read.data == {"call": 1} for read in stale_reads)
+    assert len(calls) == 2
+
+
+def test_force_fetch_bypasses_cache_and_falls_back_when_failing(
+    monkeypatch, fresh_client_state, fake_response
+):
+    responses = [fake_response({"call": 1}), fake_response({"call": 2})]
+
+    def fake_get(url, params, timeout):
+        if not responses:
+            raise requests.exceptions.Timeout()
+        return responses.pop(0)
+
+    monkeypatch.setattr(requests, "get", fake_get)
+    client = ResRobot(api_key="key")
+
+    assert client.timetable_departure(1).data == {"call": 1}
+    assert client.timetable_departure(1, force_fetch=True).data == {"call": 2}
+
+    fallback = client.timetable_departure(1, force_fetch=True)
+    assert fallback.data == {"call": 2}
+    assert fallback.stale
+
+
+def test_failed_request_without_cache_returns_empty_response(
+    monkeypatch, fresh_client_state
+):
+    monkeypatch.setattr(
+        requests, "get", fail_with(requests.exceptions.ConnectionError())
+    )
+    response = ResRobot(api_key="key").trips(1, 2)
+
+    assert response.data is None
+    assert response.fetched_at is None
@@ -0,0 +1,83 @@
+import threading
+
+import pandas as pd
+import pytest
+import requests
+
+from backend import weather
+from backend.resilience import CircuitBreaker
+from backend.weather import WeatherService
+
+
+@pytest.fixture
+def fake_get(monkeypatch, fake_response):
+    monkeypatch.setattr(weather, "_weather_cache", {})
+    monkeypatch.setattr(weather, "_breaker", CircuitBreaker())
+    calls = []
+    lock = threading.Lock()
+
+    def get(url, params, timeout):
+        with lock:
+            calls.append((params["lat"], params["lon"]))
+        return fake_response({"lat": params["lat"], "lon": params["lon"]})
+
+    monkeypatch.setattr(requests, "get", get)
+    return calls
+
+
+def test_cell_maps_nearby_coordinates_to_the_same_cell():
+    service = WeatherService("key")
+
+    # Umeå Centralstation and Umeå Östra station, about 2 km apart
+    assert service.cell(63.830064, 20.26681) == service.cell(63.817659, 20.293454)
+    # Sundsvall Centralstation is in another cell
+    assert service.cell(63.830064, 20.26681) != service.cell(62.386873, 17.315633)
+
+
+def test_cell_center_is_close_to_the_coordinate():
+    service = WeatherService("key")
+    lat, lon = service.cell_center(service.cell(57.708895, 11.973479))
+
+    assert lat == pytest.approx(57.7)
+    assert lon == pytest.approx(12.0)
+
+
+def test_nearby_stops_share_one_cached_reading(fake_get):
+    service = WeatherService("key")
+    first = service.get(63.830064, 20.26681)
+    second = service.get(63.817659, 20.293454)
+
+    assert first is second
+    assert len(fake_get) == 1
+
+
+def test_expired_reading_is_fetched_again_and_evicted(fake_get):
+    service = WeatherService("key", ttl=60)
+    service.get(63.830064, 20.26681)
+    for key, (fetched_at, data) in list(weather._weather_cache.items()):
+        weather._weather_cache[key] = (fetched_at - 61, data)
+
+    service.get(62.386873, 17.315633)
+    assert len(weather._weather_cache) == 1
+
+    service.get(63.830064, 20.26681)
+    assert len(fake_get) == 3
+
+
+def test_for_trip_fetches_each_distinct_cell_once(fake_get):
+    service = WeatherService("key")
+    df_stops = pd.DataFrame(
+        {
+            "lat": [63.830064, 63.817659, 62.386873, 62.386873, None],
+            "lon": [20.26681, 20.293454, 17.315633, 17.315633, None],
+        }
+    )
+
+    result = service.for_trip(df_stops)
+
+    assert len(result) == 2
+    assert len(fake_get) == 2
+    assert all(w is not None for w in result.values())
+
+    service.for_trip(df_stops)
+    assert len(fake_get) == 2